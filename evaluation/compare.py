@@ -0,0 +1,183 @@
+import math
+import argparse
+from pathlib import Path
+
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+import numpy as np
+
+from evaluation.evaluate import load_val_data, load_predictions, exact_match, parse_result_name
+
+
+def build_correctness_matrix(results_dir: str, dataset: str, data_dir: str = "data"):
+    """
+    读取某数据集的所有结果文件，构建 (策略 × 任务) 的正确性矩阵。
+
+    返回:
+    tuple: (策略名列表, bool 矩阵，形状 [策略数, 任务数])
+    """
+    val_data = load_val_data(Path(data_dir) / f"{dataset}.jsonl")
+    gts = [task["test"][0]["output"] for task in val_data]
+
+    strategies, rows = [], []
+    for pred_file in sorted(Path(results_dir).glob("*.json")):
+        strategy, file_dataset = parse_result_name(pred_file.stem)
+        if file_dataset != dataset:
+            continue
+        preds = load_predictions(pred_file)
+        if len(preds) != len(gts):
+            print(f"跳过 {pred_file.name}: 任务数量不匹配（{len(preds)} vs {len(gts)}）")
+            continue
+        strategies.append(strategy)
+        rows.append([exact_match(item.get("predicted_grid"), gt) for item, gt in zip(preds, gts)])
+
+    return strategies, np.array(rows, dtype=bool).reshape(len(rows), len(gts))
+
+
+def bootstrap_ci(correct: np.ndarray, resamples: int, rng: np.random.Generator, alpha: float = 0.05) -> np.ndarray:
+    """
+    对每个策略的准确率做 bootstrap 置信区间；所有策略共享同一组任务重采样下标。
+
+    返回:
+    np.ndarray: 形状 [策略数, 2]，每行为 (下界, 上界)
+    """
+    n_tasks = correct.shape[1]
+    idx = rng.integers(0, n_tasks, size=(resamples, n_tasks))
+    # [策略数, 重采样数]
+    accs = correct[:, idx].mean(axis=2)
+    return np.quantile(accs, [alpha / 2, 1 - alpha / 2], axis=1).T
+
+
+def mcnemar_exact(b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    精确 McNemar 检验（双侧）：b、c 为两策略各自独对的任务数，逐元素计算 p 值。
+    """
+    p = np.ones(b.shape)
+    for pos in np.ndindex(b.shape):
+        n, k = int(b[pos] + c[pos]), int(min(b[pos], c[pos]))
+        if n > 0:
+            tail = sum(math.comb(n, i) for i in range(k + 1)) / 2 ** n
+            p[pos] = min(1.0, 2 * tail)
+    return p
+
+
+def paired_permutation_test(correct: np.ndarray, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    配对符号翻转置换检验：对所有策略对一次性向量化计算双侧 p 值。
+
+    返回:
+    np.ndarray: 形状 [策略数, 策略数] 的 p 值矩阵
+    """
+    values = correct.astype(np.float64)
+    n_tasks = values.shape[1]
+    # [策略数, 策略数, 任务数] 的逐任务差值
+    diffs = values[:, None, :] - values[None, :, :]
+    observed = np.abs(diffs.mean(axis=2))
+
+    signs = rng.choice(np.array([-1.0, 1.0]), size=(resamples, n_tasks))
+    # [重采样数, 策略数, 策略数]
+    null = np.abs(np.einsum("rt,ijt->rij", signs, diffs) / n_tasks)
+    # 加 1 校正，避免 p 值为 0
+    return ((null >= observed[None] - 1e-12).sum(axis=0) + 1) / (resamples + 1)
+
+
+def holm_adjust(p: np.ndarray) -> np.ndarray:
+    """
+    Holm-Bonferroni 多重比较校正：对对称 p 值矩阵的上三角（全部两两比较）统一校正。
+
+    返回:
+    np.ndarray: 与 p 同形状的校正后 p 值矩阵（对角线为 1）
+    """
+    rows, cols = np.triu_indices(p.shape[0], k=1)
+    raw = p[rows, cols]
+    m = len(raw)
+    order = np.argsort(raw, kind="stable")
+    # 第 k 小的 p 值乘以 (m - k)，再取累积最大值保证单调
+    adjusted_sorted = np.minimum(np.maximum.accumulate((m - np.arange(m)) * raw[order]), 1.0)
+    adjusted = np.empty(m)
+    adjusted[order] = adjusted_sorted
+
+    result = np.ones_like(p, dtype=np.float64)
+    result[rows, cols] = adjusted
+    result[cols, rows] = adjusted
+    return result
+
+
+def print_comparison(strategies: list, correct: np.ndarray, ci: np.ndarray,
+                     wins: np.ndarray, p_mcnemar: np.ndarray, p_perm: np.ndarray, alpha: float):
+    """打印带置信区间的排名，以及两两胜负矩阵（显著性按 Holm 校正后的 p 值判断）"""
+    n_pairs = len(strategies) * (len(strategies) - 1) // 2
+    adj_mcnemar, adj_perm = holm_adjust(p_mcnemar), holm_adjust(p_perm)
+    acc = correct.mean(axis=1)
+    order = np.argsort(-acc, kind="stable")
+
+    print("\n" + "="*80)
+    print(f"策略准确率与 {(1 - alpha) * 100:.0f}% bootstrap 置信区间（任务数: {correct.shape[1]}）")
+    print("="*80)
+    for i in order:
+        print(f"策略: {strategies[i]:<25} | 准确率: {acc[i]*100:5.2f}% | "
+              f"CI: [{ci[i, 0]*100:5.2f}%, {ci[i, 1]*100:5.2f}%]")
+
+    width = max(10, max(len(s) for s in strategies) + 1)
+    print("\n" + "="*80)
+    print("两两胜负矩阵：单元格为 行策略独对数/列策略独对数")
+    print(f"* 表示 McNemar 与置换检验经 Holm 校正（{n_pairs} 组两两比较）后均 p < {alpha}")
+    print("="*80)
+    print(" " * width + "".join(f"{strategies[j][:width - 1]:>{width}}" for j in order))
+    for i in order:
+        cells = []
+        for j in order:
+            if i == j:
+                cells.append(f"{'-':>{width}}")
+                continue
+            mark = "*" if adj_mcnemar[i, j] < alpha and adj_perm[i, j] < alpha else ""
+            cells.append(f"{f'{wins[i, j]}/{wins[j, i]}{mark}':>{width}}")
+        print(f"{strategies[i][:width - 1]:<{width}}" + "".join(cells))
+
+    print("\n" + "="*80)
+    print("两两检验 p 值（括号内为 Holm 校正后）")
+    print("="*80)
+    for a_pos, i in enumerate(order):
+        for j in order[a_pos + 1:]:
+            print(f"{strategies[i]:<25} vs {strategies[j]:<25} | 胜/负: {wins[i, j]:>3}/{wins[j, i]:<3} | "
+                  f"McNemar p: {p_mcnemar[i, j]:.4f} ({adj_mcnemar[i, j]:.4f}) | "
+                  f"置换检验 p: {p_perm[i, j]:.4f} ({adj_perm[i, j]:.4f})")
+    print("="*80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于 bootstrap 和配对检验比较各策略准确率的显著性")
+    parser.add_argument("--dataset", type=str, default="val", choices=["val", "val_hard"],
+                        help="选择数据集: val 或 val_hard")
+    parser.add_argument("--results_dir", type=str, default="results",
+                        help="结果目录（默认 results/）")
+    parser.add_argument("--resamples", type=int, default=10000,
+                        help="bootstrap 与置换检验的重采样次数（默认 10000）")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="显著性水平（默认 0.05）")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="随机种子")
+
+    args = parser.parse_args()
+
+    strategies, correct = build_correctness_matrix(args.results_dir, args.dataset)
+    if len(strategies) < 2:
+        print(f"{args.results_dir}/ 下数据集 {args.dataset} 的结果文件不足 2 个，无法比较")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    ci = bootstrap_ci(correct, args.resamples, rng, args.alpha)
+
+    # wins[i, j]: 策略 i 做对而策略 j 做错的任务数
+    wins = (correct[:, None, :] & ~correct[None, :, :]).sum(axis=2)
+    p_mcnemar = mcnemar_exact(wins, wins.T)
+    p_perm = paired_permutation_test(correct, args.resamples, rng)
+
+    print_comparison(strategies, correct, ci, wins, p_mcnemar, p_perm, args.alpha)
+
+
+if __name__ == "__main__":
+    main()
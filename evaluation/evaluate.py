@@ -59,6 +59,21 @@ def evaluate_single(val_data: list, preds: list, file_name: str) -> dict:
     }
 
 
+def parse_result_name(stem: str) -> tuple[str, str]:
+    """从结果文件名（不含扩展名）解析 (策略名, 数据集名)"""
+    # 从右往左解析，或者匹配已知的数据集后缀
+    if stem.endswith("_val_hard"):
+        # 去掉后缀，剩下的就是策略名
+        return stem[:-9], "val_hard"
+    if stem.endswith("_val"):
+        return stem[:-4], "val"
+    # 如果不是标准后缀，则假设最后一个下划线后是数据集
+    parts = stem.rsplit("_", 1)
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return stem, "unknown"
+
+
 def print_summary(results: list[dict]):
     """打印所有结果的汇总"""
     print("\n" + "="*80) 
@@ -69,24 +84,7 @@ def print_summary(results: list[dict]):
     sorted_results = sorted(results, key=lambda x: x["accuracy"], reverse=True)
 
     for res in sorted_results:
-        stem = res["file"].stem
-        # 从右往左解析，或者匹配已知的数据集后缀
-        if stem.endswith("_val_hard"):
-            dataset = "val_hard"
-            # 去掉后缀，剩下的就是策略名
-            strategy = stem[:-9]
-        elif stem.endswith("_val"):
-            dataset = "val"
-            strategy = stem[:-4]
-        else:
-            # 如果不是标准后缀，则假设最后一个下划线后是数据集
-            parts = stem.rsplit("_", 1)
-            if len(parts) == 2:
-                strategy = parts[0]
-                dataset = parts[1]
-            else:
-                strategy = stem
-                dataset = "unknown"
+        strategy, dataset = parse_result_name(res["file"].stem)
 
         print(f"文件: {res['file'].name:<35} | "
               f"数据集: {dataset:<8} | " 
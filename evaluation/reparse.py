@@ -0,0 +1,137 @@
+import json
+import argparse
+from pathlib import Path
+from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# 解析函数
+from utils.parse import parse_output, PARSER_VERSION
+from utils.fileio import write_json_atomic
+
+
+def load_predictions(path: Path):
+    """加载推理结果 JSON 文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_result_file(preds) -> bool:
+    """判断是否为推理结果文件（结果记录列表），用于跳过 runs.json、指纹索引等其他 JSON 文件"""
+    return (isinstance(preds, list) and bool(preds)
+            and all(isinstance(item, dict) and "task_id" in item and "raw_output" in item for item in preds))
+
+
+def is_correct(item: dict, grid) -> bool:
+    """与结果中保存的 ground_truth 比较是否完全匹配"""
+    return grid is not None and grid == item.get("ground_truth")
+
+
+def reparse_all(pred_files: list, workers: Optional[int], chunksize: int = 8) -> Tuple[dict, dict]:
+    """
+    用当前 parse_output 并行重解析所有文件中的 raw_output。
+
+    返回:
+    tuple: (all_preds, new_grids)
+           all_preds 为 {文件路径: 原结果列表}（不是结果记录列表的 JSON 文件会被跳过）；
+           new_grids 为 {文件路径: 新的 predicted_grid 列表}，顺序与文件内条目一致
+    """
+    all_preds = {}
+    for path in pred_files:
+        preds = load_predictions(path)
+        if is_result_file(preds):
+            all_preds[path] = preds
+        else:
+            print(f"跳过非结果文件: {path.name}")
+
+    # 将所有文件的 raw_output 拉平成一个序列，一次性送入进程池
+    flat_raw = [item.get("raw_output") for preds in all_preds.values() for item in preds]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        flat_grids = list(executor.map(parse_output, flat_raw, chunksize=chunksize))
+
+    new_grids = {}
+    offset = 0
+    for path, preds in all_preds.items():
+        new_grids[path] = flat_grids[offset:offset + len(preds)]
+        offset += len(preds)
+    return all_preds, new_grids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线重解析已保存的 raw_output，刷新 predicted_grid（不调用 API）")
+    parser.add_argument("--pred", type=str, default="all",
+                        help="单个预测结果 JSON 文件路径，或 'all' 表示 results/ 目录下所有文件")
+    parser.add_argument("--results_dir", type=str, default="results",
+                        help="结果目录（批量模式时使用，默认 results/）")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="进程池大小（默认 CPU 核数）")
+    parser.add_argument("--dry_run", action="store_true",
+                        help="只打印变化，不写回结果文件")
+
+    args = parser.parse_args()
+
+    if args.pred == "all":
+        results_dir = Path(args.results_dir)
+        if not results_dir.exists():
+            raise FileNotFoundError(f"结果目录不存在: {results_dir}")
+        pred_files = sorted(results_dir.glob("*.json"))
+    else:
+        pred_files = [Path(args.pred)]
+        if not pred_files[0].exists():
+            raise FileNotFoundError(f"预测文件不存在: {pred_files[0]}")
+
+    if not pred_files:
+        print(f"{args.results_dir}/ 目录下没有找到任何 *.json 文件")
+        return
+
+    all_preds, new_grids = reparse_all(pred_files, args.workers)
+
+    print("\n" + "=" * 80)
+    print(f"重解析汇总（parser_version = {PARSER_VERSION}）")
+    print("=" * 80)
+
+    total_fixed, total_broken = 0, 0
+    for path, preds in all_preds.items():
+        fixed, broken, changed = [], [], 0
+
+        for item, new_grid in zip(preds, new_grids[path]):
+            # 复用同构任务答案的记录没有模型输出，保留其答案
+            if item.get("reused_from"):
+                continue
+            old_grid = item.get("predicted_grid")
+            if new_grid != old_grid:
+                changed += 1
+            old_ok, new_ok = is_correct(item, old_grid), is_correct(item, new_grid)
+            if not old_ok and new_ok:
+                fixed.append(item.get("task_id"))
+            elif old_ok and not new_ok:
+                broken.append(item.get("task_id"))
+
+            item["predicted_grid"] = new_grid
+            item["parser_version"] = PARSER_VERSION
+
+        print(f"文件: {path.name:<35} | 预测变化: {changed:>3} | "
+              f"fail→pass: {len(fixed):>3} | pass→fail: {len(broken):>3}")
+        if fixed:
+            print(f"  fail→pass 任务: {fixed}")
+        if broken:
+            print(f"  pass→fail 任务: {broken}")
+
+        total_fixed += len(fixed)
+        total_broken += len(broken)
+
+        if not args.dry_run:
+            write_json_atomic(path, preds)
+
+    print("=" * 80)
+    print(f"合计 fail→pass: {total_fixed}，pass→fail: {total_broken}")
+    if args.dry_run:
+        print("dry_run 模式：结果文件未被修改")
+
+
+if __name__ == "__main__":
+    main()
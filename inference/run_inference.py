@@ -1,9 +1,12 @@
 import json
 import os
 import argparse
+import hashlib
 import importlib
+import inspect
+import time
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 import sys
 
@@ -15,6 +18,13 @@ from dotenv import load_dotenv
 
 # 解析函数
 from utils.parse import parse_output
+# 本地校验函数（级联模式使用）
+from utils.validate import check_prediction, majority_vote
+# 自适应 max_tokens / timeout
+from utils.budget import (DEFAULT_MAX_TOKENS, DEFAULT_TIMEOUT, CHARS_PER_TOKEN,
+                          build_budget_profile, lookup_budget, task_area, expected_output_area)
+# 同构任务指纹索引
+from utils.fingerprint import load_index, save_index, lookup_answer, record_answer
 
 # 加载配置
 load_dotenv()
@@ -50,27 +60,46 @@ def discover_strategies() -> Dict[str, Callable]:
 
 STRATEGY_MAP: Dict[str, Callable] = discover_strategies()  # 自动发现
 
+# 级联模式默认顺序：按 results/ 中各策略平均输出长度从低到高排列
+DEFAULT_CASCADE_ORDER = ["implicit_cot", "baseline", "visual_cot", "structured", "reflection", "hypothesis_search"]
 
-def call_deepseek(messages: list) -> Optional[str]:
-    """调用 DeepSeek API"""
+
+def call_deepseek_detailed(messages: list, max_tokens: int = DEFAULT_MAX_TOKENS,
+                           timeout: int = DEFAULT_TIMEOUT, temperature: float = 1.0,
+                           model: Optional[str] = None) -> Optional[dict]:
+    """
+    调用 DeepSeek API，返回输出文本及 token 用量、耗时、结束原因（超时时 finish_reason 为 "timeout"）。
+    model 为 None 时使用 .env 中的 DEEPSEEK_MODEL。
+    """
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json"
     }
     
     payload = {
-        "model": MODEL_NAME,            # 从 .env 读取模型名
+        "model": model or MODEL_NAME,   # 默认从 .env 读取模型名
         "messages": messages,
-        "temperature": 1.0,
-        "max_tokens": 8000,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
     }
     
     try:
         full_url = API_URL.rstrip("/") + "/chat/completions" 
-        response = requests.post(full_url, headers=headers, json=payload, timeout=120)
+        start = time.perf_counter()
+        response = requests.post(full_url, headers=headers, json=payload, timeout=timeout)
+        latency = time.perf_counter() - start
         response.raise_for_status()
         result = response.json()
-        return result["choices"][0]["message"]["content"]
+        choice = result["choices"][0]
+        return {
+            "content": choice["message"]["content"],
+            "finish_reason": choice.get("finish_reason"),
+            "usage": result.get("usage"),
+            "latency": latency,
+        }
+    except requests.exceptions.Timeout as e:
+        print(f"API 调用超时: {e}")
+        return {"content": None, "finish_reason": "timeout", "usage": None, "latency": float(timeout)}
     except requests.exceptions.RequestException as e:
         print(f"API 调用失败: {e}")
         return None
@@ -79,16 +108,72 @@ def call_deepseek(messages: list) -> Optional[str]:
         return None
 
 
-def process_single_task(task: dict, construct_prompt: Callable, taskid: str) -> dict:
-    """处理单个 ARC 任务"""
+def call_deepseek(messages: list) -> Optional[str]:
+    """调用 DeepSeek API"""
+    detail = call_deepseek_detailed(messages)
+    return detail["content"] if detail else None
+
+
+def call_with_budget(messages: list, budget: Tuple[int, int],
+                     options: Optional[dict] = None) -> Tuple[Optional[dict], dict]:
+    """
+    按自适应预算调用 API；输出被截断（finish_reason == "length"）时加倍 max_tokens 重发。
+    超时不重发：timeout 只会比固定默认值更短，重发会拉长尾部延迟。
+    options 为其余透传给 call_deepseek_detailed 的参数（如 temperature、model）。
+
+    返回:
+    tuple: (最后一次有返回的调用结果, 预算记录 {"max_tokens", "timeout", "reissues"})
+    """
+    max_tokens, timeout = budget
+    spent_tokens, spent_latency = 0, 0.0
+    reissues = []
+    # 最后一次有返回的调用；重发时请求失败则退回它（如被截断的输出），不丢弃已有结果和开销
+    last = None
+
+    while True:
+        detail = call_deepseek_detailed(messages, max_tokens=max_tokens, timeout=timeout, **(options or {}))
+        if detail is None:
+            break
+        last = detail
+        spent_tokens += (detail["usage"] or {}).get("total_tokens", 0)
+        spent_latency += detail["latency"]
+
+        if detail["finish_reason"] != "length" or max_tokens >= DEFAULT_MAX_TOKENS:
+            break
+        max_tokens = min(max_tokens * 2, DEFAULT_MAX_TOKENS)
+        reissues.append("length")
+        print(f"输出被截断，放宽预算重发（max_tokens={max_tokens}）")
+
+    if last is not None:
+        # 重发产生的开销也计入本次任务
+        last = dict(last, latency=spent_latency,
+                    usage=dict(last["usage"] or {}, total_tokens=spent_tokens))
+    return last, {"max_tokens": max_tokens, "timeout": timeout, "reissues": reissues}
+
+
+def process_single_task(task: dict, construct_prompt: Callable, taskid: str,
+                        budget: Optional[Tuple[int, int]] = None, options: Optional[dict] = None,
+                        verbose: bool = True) -> dict:
+    """
+    处理单个 ARC 任务。
+
+    budget 为 (max_tokens, timeout)，为 None 时使用固定默认值；
+    options 为透传给 call_deepseek_detailed 的参数（如 temperature、model、max_tokens）。
+    """
     messages = construct_prompt(task)
     
-    print("正在调用模型...")
-    raw_output = call_deepseek(messages)
+    if verbose:
+        print("正在调用模型...")
+    if budget is None:
+        detail = call_deepseek_detailed(messages, **(options or {}))
+        budget_record = None
+    else:
+        detail, budget_record = call_with_budget(messages, budget, options)
+    raw_output = detail["content"] if detail else None
     
     predicted_grid = parse_output(raw_output) if raw_output else None
     
-    if raw_output:
+    if raw_output and verbose:
         print("模型原始输出（前500字符）：")
         print(raw_output[:500] + "..." if len(raw_output) > 500 else raw_output)
     
@@ -97,12 +182,64 @@ def process_single_task(task: dict, construct_prompt: Callable, taskid: str) ->
         "messages": messages,
         "raw_output": raw_output,
         "predicted_grid": predicted_grid,
-        "ground_truth": task["test"][0]["output"]
+        "ground_truth": task["test"][0]["output"],
+        "usage": detail["usage"] if detail else None,
+        "latency": detail["latency"] if detail else None,
+        "finish_reason": detail["finish_reason"] if detail else None,
+        "budget": budget_record,
+    }
+
+
+def index_namespace(strategy_name: str, prompt_funcs: List[Callable], model: Optional[str] = None,
+                    temperature: float = 1.0, **settings) -> str:
+    """
+    指纹索引分区名：策略名 + 模型 + 温度 + 其余影响答案的设置 + 提示词模块源码哈希。
+    修改提示词、换模型或温度后使用新的分区，不会复用旧配置的答案。
+    """
+    digest = hashlib.sha1()
+    for func in prompt_funcs:
+        digest.update(Path(inspect.getsourcefile(func)).read_bytes())
+    parts = [strategy_name, f"model={model or MODEL_NAME}", f"temperature={temperature}"]
+    parts += [f"{key}={value}" for key, value in settings.items()]
+    parts.append(f"prompt={digest.hexdigest()[:8]}")
+    return "|".join(parts)
+
+
+def reuse_answer(index: Optional[dict], namespace: str, task: dict, construct_prompt: Callable,
+                 taskid: str, source: str) -> Optional[dict]:
+    """
+    若索引中已有其他同构任务的答案，映射回当前任务后直接构造结果，不调用 API。
+    source 为当前任务的来源标识（"数据集/任务 ID"），该任务自己上次的答案不会被复用。
+    """
+    if index is None:
+        return None
+    grid, entry = lookup_answer(index, namespace, task, exclude_source=source)
+    if grid is None:
+        return None
+
+    print(f"任务 {taskid} 与已解决任务 {entry['source']} 同构，复用其答案")
+    return {
+        "task_id": taskid,
+        "messages": construct_prompt(task),
+        "raw_output": None,       # 没有模型输出，答案来自 reused_from 指向的任务
+        "predicted_grid": grid,
+        "ground_truth": task["test"][0]["output"],
+        "usage": None,
+        "latency": None,          # 未实际调用 API，不记录耗时
+        "finish_reason": None,
+        "budget": None,
+        "reused_from": entry["source"],
     }
 
 
-def run_strategy(strategy_name: str, construct_prompt: Callable, dataset: str, limit: Optional[int], output_dir: str):
-    """运行单个策略的推理"""
+def run_strategy(strategy_name: str, construct_prompt: Callable, dataset: str, limit: Optional[int], output_dir: str,
+                 profile: Optional[dict] = None, index: Optional[dict] = None):
+    """
+    运行单个策略的推理。
+
+    提供 profile 时按历史分布为每个任务设置 max_tokens 和 timeout；
+    提供 index 时复用同构任务的已有答案，并把新答案写回索引。
+    """
     print(f"\n=== 开始运行策略: {strategy_name} ===")
     
     # 数据路径
@@ -116,6 +253,7 @@ def run_strategy(strategy_name: str, construct_prompt: Callable, dataset: str, l
     output_file = output_dir_path / f"{strategy_name}_{dataset}.json"
     
     results = []
+    namespace = index_namespace(strategy_name, [construct_prompt]) if index is not None else None
     
     with open(data_path, "r", encoding="utf-8") as f:
         for line_idx, line in enumerate(f):
@@ -124,7 +262,13 @@ def run_strategy(strategy_name: str, construct_prompt: Callable, dataset: str, l
                 
             task = json.loads(line.strip())
             current_task_id = f"task_{line_idx:02d}"
-            result = process_single_task(task, construct_prompt, current_task_id)
+            source = f"{dataset}/{current_task_id}"
+            result = reuse_answer(index, namespace, task, construct_prompt, current_task_id, source)
+            if result is None:
+                budget = lookup_budget(profile, strategy_name, task_area(task), expected_output_area(task)) if profile else None
+                result = process_single_task(task, construct_prompt, current_task_id, budget)
+                if index is not None:
+                    record_answer(index, namespace, task, result["predicted_grid"], source)
             result["strategy"] = strategy_name
             results.append(result)
             
@@ -135,22 +279,261 @@ def run_strategy(strategy_name: str, construct_prompt: Callable, dataset: str, l
         json.dump(results, f, ensure_ascii=False, indent=2)
     
     print(f"策略 {strategy_name} 推理完成！结果已保存到: {output_file}")
+    print(f"共处理 {len(results)} 个任务")
+    if profile:
+        print_budget_report(results)
+    print()
+
+
+def print_budget_report(results: list):
+    """打印自适应预算下的截断重发次数和最终仍被截断/超时的任务数"""
+    records = [r["budget"] for r in results if r.get("budget")]
+    truncated = sum(r["reissues"].count("length") for r in records)
+    still_truncated = sum(1 for r in results if r.get("finish_reason") == "length")
+    timed_out = sum(1 for r in results if r.get("finish_reason") == "timeout")
+    print(f"自适应预算: 截断重发 {truncated} 次 | 最终仍被截断 {still_truncated} 个 | 超时 {timed_out} 个")
+
+
+def total_tokens(result: dict) -> int:
+    """读取单次调用的 token 总数（无 usage 信息时记为 0）"""
+    usage = result.get("usage") or {}
+    return usage.get("total_tokens", 0)
+
+
+def run_cascade(order: List[str], dataset: str, limit: Optional[int], output_dir: str,
+                samples: int = 1, min_agreement: float = 0.5, profile: Optional[dict] = None,
+                index: Optional[dict] = None):
+    """
+    级联推理：先用最便宜的策略，只有当答案未通过本地检查时才升级到下一个策略。
+
+    本地检查包括：解析失败、非矩形/颜色越界、尺寸与训练样本推断结果不一致，
+    以及多次采样（samples > 1）时一致率低于 min_agreement。
+    最后一级策略的答案无论是否通过检查都会被采用。
+    """
+    print(f"\n=== 开始运行级联策略: {' -> '.join(order)} ===")
+
+    data_path = Path("data") / f"{dataset}.jsonl"
+    if not data_path.exists():
+        raise FileNotFoundError(f"数据集不存在: {data_path}")
+
+    output_dir_path = Path(output_dir)
+    output_dir_path.mkdir(exist_ok=True)
+    output_file = output_dir_path / f"cascade_{dataset}.json"
+
+    results = []
+    namespace = None
+    if index is not None:
+        namespace = index_namespace("cascade", [STRATEGY_MAP[name] for name in order], order=",".join(order),
+                                    samples=samples, min_agreement=min_agreement)
+    # 最后一级策略的实际调用开销，用于估算“全部任务都用最贵策略”的开销
+    last_stage_calls = []
+
+    with open(data_path, "r", encoding="utf-8") as f:
+        for line_idx, line in enumerate(f):
+            if limit is not None and line_idx >= limit:
+                break
+
+            task = json.loads(line.strip())
+            current_task_id = f"task_{line_idx:02d}"
+            source = f"{dataset}/{current_task_id}"
+            reused = reuse_answer(index, namespace, task, STRATEGY_MAP[order[0]], current_task_id, source)
+            if reused is not None:
+                reused.update(strategy="cascade", solved_by=None, cascade_trace=[])
+                results.append(reused)
+                print(f"完成任务 {line_idx + 1}（复用同构任务答案）")
+                continue
+
+            trace = []
+            final = None
+
+            for stage_idx, strategy_name in enumerate(order):
+                budget = lookup_budget(profile, strategy_name, task_area(task), expected_output_area(task)) if profile else None
+                stage_results = [process_single_task(task, STRATEGY_MAP[strategy_name], current_task_id, budget)
+                                 for _ in range(samples)]
+                grid, agreement = majority_vote([r["predicted_grid"] for r in stage_results])
+                passed, reason = check_prediction(task, grid)
+                if passed and agreement < min_agreement:
+                    passed, reason = False, "low_agreement"
+
+                tokens = sum(total_tokens(r) for r in stage_results)
+                # 按字符数估算的 token 数，参考开销只能估算时用于同口径比较
+                est_tokens = sum(estimate_text_tokens(r) for r in stage_results)
+                latency = sum(r["latency"] or 0.0 for r in stage_results)
+                trace.append({
+                    "strategy": strategy_name,
+                    "check": reason,
+                    "agreement": agreement,
+                    "tokens": tokens,
+                    "est_tokens": est_tokens,
+                    "latency": latency,
+                })
+                if stage_idx == len(order) - 1:
+                    last_stage_calls.append((tokens, est_tokens, latency))
+
+                # 保留最近一个有解析结果的阶段作为候选答案
+                if final is None or grid is not None:
+                    final = next((r for r in stage_results if r["predicted_grid"] == grid), stage_results[0])
+                    final = dict(final, predicted_grid=grid, solved_by=strategy_name)
+
+                if passed:
+                    break
+                if stage_idx < len(order) - 1:
+                    print(f"任务 {current_task_id} 在 {strategy_name} 未通过检查（{reason}），升级策略")
+
+            # 所有阶段都没有解析出网格时不归功于任何策略
+            if final["predicted_grid"] is None:
+                final["solved_by"] = None
+            final["strategy"] = "cascade"
+            final["cascade_trace"] = trace
+            final["usage"] = {"total_tokens": sum(t["tokens"] for t in trace)}
+            final["latency"] = sum(t["latency"] for t in trace)
+            results.append(final)
+            if index is not None:
+                record_answer(index, namespace, task, final["predicted_grid"], source)
+
+            if final["solved_by"] is None:
+                print(f"完成任务 {line_idx + 1}（所有策略均未给出答案）")
+            else:
+                print(f"完成任务 {line_idx + 1}（由 {final['solved_by']} 给出答案）")
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print_cascade_report(results, order, dataset, output_dir_path, last_stage_calls, samples)
+    print(f"级联推理完成！结果已保存到: {output_file}")
     print(f"共处理 {len(results)} 个任务\n")
 
 
+def estimate_text_tokens(item: dict) -> float:
+    """按提示词和 raw_output 的字符数估算单次调用的 token 总数"""
+    prompt_chars = sum(len(m.get("content") or "") for m in item.get("messages") or [])
+    return (prompt_chars + len(item.get("raw_output") or "")) / CHARS_PER_TOKEN
+
+
+
+def estimate_reference_cost(results: list, strategy_name: str, dataset: str, output_dir: Path,
+                            last_stage_calls: list, samples: int = 1) -> dict:
+    """
+    估算所有任务都直接使用最贵策略时的 token 总数和总耗时。
+
+    token：该策略已有结果文件全部记录了 usage 时直接使用；否则按提示词和 raw_output 的字符数逐任务估算，
+    此时 estimated 为 True，级联一侧也应使用同一规则估算的 token 数比较。
+    没有结果文件时才用本次级联最后一级的平均开销外推（这些任务是最难的，会高估）。
+    耗时：优先使用结果文件中记录的 latency，否则用最后一级调用的“每 token 耗时”乘以估算的 token 数。
+
+    返回:
+    dict: {"tokens", "tokens_source", "estimated", "latency", "latency_source"}，无法估算的项为 None
+    """
+    n_tasks = len(results)
+    estimate = {"tokens": None, "tokens_source": None, "estimated": False, "latency": None, "latency_source": None}
+
+    ref = []
+    ref_file = output_dir / f"{strategy_name}_{dataset}.json"
+    if ref_file.exists():
+        with open(ref_file, "r", encoding="utf-8") as f:
+            ref = json.load(f)[:n_tasks]
+        if len(ref) != n_tasks:
+            ref = []
+
+    if ref:
+        if all(item.get("usage") for item in ref):
+            estimate["tokens"] = sum(total_tokens(item) for item in ref) * samples
+            estimate["tokens_source"] = "已记录 usage"
+        else:
+            estimate["tokens"] = sum(estimate_text_tokens(item) for item in ref) * samples
+            estimate["tokens_source"] = "按已保存提示词和 raw_output 长度估算"
+            estimate["estimated"] = True
+        if all(item.get("latency") is not None for item in ref):
+            estimate["latency"] = sum(item["latency"] for item in ref) * samples
+            estimate["latency_source"] = "已记录 latency"
+    elif last_stage_calls:
+        mean_tokens = sum(t for t, _, _ in last_stage_calls) / len(last_stage_calls)
+        estimate["tokens"] = mean_tokens * n_tasks
+        estimate["tokens_source"] = "由进入最后一级的任务外推（偏高估）"
+
+    if estimate["latency"] is None and estimate["tokens"] is not None and last_stage_calls:
+        # 每 token 耗时与参考 token 数使用同一口径
+        spent_tokens = sum(e if estimate["estimated"] else t for t, e, _ in last_stage_calls)
+        spent_latency = sum(l for _, _, l in last_stage_calls)
+        if spent_tokens:
+            estimate["latency"] = spent_latency / spent_tokens * estimate["tokens"]
+            estimate["latency_source"] = "按最后一级每 token 耗时外推"
+
+    return estimate
+
+
+def print_cascade_report(results: list, order: List[str], dataset: str, output_dir: Path,
+                         last_stage_calls: list, samples: int = 1):
+    """打印级联各阶段的处理数量，以及相对“全部使用最贵策略”节省的 token 和耗时"""
+    print("\n" + "="*80)
+    print("级联推理报告")
+    print("="*80)
+
+    for strategy_name in order:
+        reached = sum(1 for r in results if any(t["strategy"] == strategy_name for t in r["cascade_trace"]))
+        solved = sum(1 for r in results if r["solved_by"] == strategy_name)
+        print(f"策略: {strategy_name:<25} | 进入该级: {reached:>3} | 采用该级答案: {solved:>3}")
+    reused = sum(1 for r in results if r.get("reused_from"))
+    unsolved = sum(1 for r in results if r["solved_by"] is None and not r.get("reused_from"))
+    print(f"复用同构任务答案: {reused:>3} | 所有策略均未给出答案: {unsolved:>3}")
+
+    used_tokens = sum(total_tokens(r) for r in results)
+    used_latency = sum(r["latency"] or 0.0 for r in results)
+    print(f"级联总 token: {used_tokens} | 级联总耗时: {used_latency:.1f}s")
+
+    reference = estimate_reference_cost(results, order[-1], dataset, output_dir, last_stage_calls, samples)
+    ref_tokens, ref_latency = reference["tokens"], reference["latency"]
+    if ref_tokens is None:
+        print(f"没有任务进入最后一级 {order[-1]}，且无可用的参考结果文件，无法估算节省量")
+    else:
+        if reference["estimated"]:
+            # 参考开销只能按字符数估算时，级联一侧也按同一规则估算，避免实测值与估算值混比
+            used_tokens = sum(t.get("est_tokens", 0) for r in results for t in r["cascade_trace"])
+            print(f"级联总 token（按同一规则估算）: {used_tokens:.0f}")
+        saved_tokens = ref_tokens - used_tokens
+        print(f"全部使用 {order[-1]}: token {ref_tokens:.0f}（{reference['tokens_source']}）")
+        print(f"节省 token: {saved_tokens:.0f} ({saved_tokens / ref_tokens * 100 if ref_tokens else 0:.1f}%)")
+    if ref_latency is None:
+        print("无可用的耗时数据，无法估算节省耗时")
+    else:
+        saved_latency = ref_latency - used_latency
+        print(f"全部使用 {order[-1]}: 耗时 {ref_latency:.1f}s（{reference['latency_source']}）")
+        print(f"节省耗时: {saved_latency:.1f}s ({saved_latency / ref_latency * 100 if ref_latency else 0:.1f}%)")
+    print("="*80)
+
+
 def main():
     parser = argparse.ArgumentParser(description="运行 ARC 推理并保存结果")
     parser.add_argument("--dataset", type=str, default="val", choices=["val", "val_hard"],
                         help="选择数据集: val 或 val_hard")
     parser.add_argument("--strategy", type=str, required=True,
-                        help=f"选择提示策略: {', '.join(STRATEGY_MAP.keys())}")
+                        help=f"选择提示策略: {', '.join(STRATEGY_MAP.keys())}、all 或 cascade")
     parser.add_argument("--output_dir", type=str, default="results",
                         help="结果保存目录")
     parser.add_argument("--limit", type=int, default=None,
                         help="限制处理的样本数量（调试用）")
+    parser.add_argument("--cascade_order", type=str, default=",".join(DEFAULT_CASCADE_ORDER),
+                        help="级联模式（--strategy cascade）下的策略顺序，逗号分隔，从便宜到昂贵")
+    parser.add_argument("--samples", type=int, default=1,
+                        help="级联模式下每一级的采样次数，大于 1 时启用一致率检查")
+    parser.add_argument("--adaptive_budget", action="store_true",
+                        help="根据 results/ 中的历史输出长度/耗时分布，为每个请求自适应设置 max_tokens 和 timeout")
+    parser.add_argument("--budget_percentile", type=float, default=95,
+                        help="自适应预算使用的分位数（默认 95）")
+    parser.add_argument("--fingerprint_index", type=str, default=None,
+                        help="同构任务指纹索引文件路径；指定后复用旋转/翻转/颜色置换等价任务的已有答案，并把新答案写回")
+    parser.add_argument("--min_agreement", type=float, default=0.5,
+                        help="级联模式下多次采样的最低一致率，低于该值则升级策略")
     
     args = parser.parse_args()
     
+    profile = None
+    if args.adaptive_budget:
+        profile = build_budget_profile(args.output_dir, percentile=args.budget_percentile)
+        print(f"已加载自适应预算画像（P{args.budget_percentile:g}），覆盖策略: {', '.join(profile['strategies']) or '无'}")
+    
+    index = load_index(args.fingerprint_index) if args.fingerprint_index else None
+    
     if args.strategy == "all":
         # 运行所有策略
         if not STRATEGY_MAP:
@@ -161,20 +544,35 @@ def main():
         print(f"开始运行所有策略（数据集: {args.dataset}）\n")
         
         for strategy_name, construct_prompt in STRATEGY_MAP.items():
-            run_strategy(strategy_name, construct_prompt, args.dataset, args.limit, args.output_dir)
+            run_strategy(strategy_name, construct_prompt, args.dataset, args.limit, args.output_dir, profile, index)
         
         print("所有策略运行完成！")
     
+    elif args.strategy == "cascade":
+        # 级联模式
+        if args.samples < 1:
+            raise ValueError(f"--samples 必须 >= 1，当前为 {args.samples}")
+        order = [name.strip() for name in args.cascade_order.split(",") if name.strip()]
+        unknown = [name for name in order if name not in STRATEGY_MAP]
+        if not order or unknown:
+            raise ValueError(f"级联顺序中存在未知策略: {unknown}. 可用: {', '.join(STRATEGY_MAP.keys())}")
+        
+        run_cascade(order, args.dataset, args.limit, args.output_dir, args.samples, args.min_agreement, profile, index)
+    
     elif args.strategy:
         # 单个策略
         if args.strategy not in STRATEGY_MAP:
             raise ValueError(f"未知策略: {args.strategy}. 可用: {', '.join(STRATEGY_MAP.keys())} 或 'all'")
         
         construct_prompt = STRATEGY_MAP[args.strategy]
-        run_strategy(args.strategy, construct_prompt, args.dataset, args.limit, args.output_dir)
+        run_strategy(args.strategy, construct_prompt, args.dataset, args.limit, args.output_dir, profile, index)
     
     else:
         raise ValueError("请指定 --strategy <策略名> 或 --strategy all")
+    
+    if index is not None:
+        save_index(args.fingerprint_index, index)
+        print(f"指纹索引已保存到: {args.fingerprint_index}")
 
 
 if __name__ == "__main__":
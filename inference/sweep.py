@@ -0,0 +1,260 @@
+import json
+import hashlib
+import argparse
+import itertools
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from inference.run_inference import STRATEGY_MAP, process_single_task, total_tokens
+from evaluation.evaluate import exact_match
+from utils.fileio import write_json_atomic
+
+# 网格中可扫描的维度及默认值（None 表示使用 call_deepseek_detailed 的默认值 / .env 中的模型）
+SWEEP_AXES = {
+    "strategy": ["baseline"],
+    "dataset": ["val"],
+    "temperature": [1.0],
+    "max_tokens": [None],
+    "model": [None],
+}
+
+
+def expand_grid(spec: dict) -> List[dict]:
+    """把声明式网格展开为每个运行的设置列表；标量值视为只有一个取值的维度"""
+    unknown = set(spec.get("grid", {})) - set(SWEEP_AXES)
+    if unknown:
+        raise ValueError(f"未知的扫描维度: {sorted(unknown)}. 可用: {', '.join(SWEEP_AXES)}")
+
+    axes = {}
+    for name, default in SWEEP_AXES.items():
+        values = spec.get("grid", {}).get(name, default)
+        axes[name] = values if isinstance(values, list) else [values]
+
+    return [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+
+
+def run_id_of(settings: dict) -> str:
+    """由设置内容生成稳定的运行 ID：策略名 + 设置哈希"""
+    digest = hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    return f"{settings['strategy']}-{digest}"
+
+
+def call_options(settings: dict) -> dict:
+    """把运行设置转换为 process_single_task 的 options 参数"""
+    options = {"temperature": settings["temperature"]}
+    if settings["max_tokens"] is not None:
+        options["max_tokens"] = settings["max_tokens"]
+    if settings["model"] is not None:
+        options["model"] = settings["model"]
+    return options
+
+
+def load_partial(path: Path) -> Dict[str, dict]:
+    """读取未完成运行的逐任务进度文件（jsonl），返回 {task_id: 结果}"""
+    done = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    done[item["task_id"]] = item
+    return done
+
+
+def run_sweep(spec: dict, output_root: str, concurrency: int, limit: Optional[int]) -> List[dict]:
+    """
+    执行一次超参数扫描。
+
+    所有运行的 (运行, 任务) 单元共享同一个并发线程池；每完成一个单元就追加写入该运行的进度文件，
+    运行的全部任务完成后才写出最终结果文件。重启时已完成的运行和单元都会被跳过；
+    已有结果文件只覆盖部分任务（例如之前用了更小的 --limit）时，只补跑缺少的任务。
+    API 调用失败、超时或执行出错的单元不记为完成，下次重启会重试；
+    每个单元的结果在工作线程内立即写入进度文件，中断时尚未开始的单元会被取消。
+
+    返回:
+    list: 所有运行的清单 [{"run_id", "settings", "output"}, ...]
+    """
+    sweep_dir = Path(output_root) / spec["name"]
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+
+    runs = []
+    for settings in expand_grid(spec):
+        if settings["strategy"] not in STRATEGY_MAP:
+            raise ValueError(f"未知策略: {settings['strategy']}. 可用: {', '.join(STRATEGY_MAP.keys())}")
+        run_id = run_id_of(settings)
+        runs.append({
+            "run_id": run_id,
+            "settings": settings,
+            "output": f"{run_id}_{settings['dataset']}.json",
+        })
+    write_json_atomic(sweep_dir / "runs.json", runs)
+
+    datasets = {}
+    for dataset in {run["settings"]["dataset"] for run in runs}:
+        data_path = Path("data") / f"{dataset}.jsonl"
+        if not data_path.exists():
+            raise FileNotFoundError(f"数据集不存在: {data_path}")
+        with open(data_path, "r", encoding="utf-8") as f:
+            datasets[dataset] = [json.loads(line) for line in f][:limit]
+
+    # 收集所有待执行的单元
+    pending, progress = [], {}
+    for run in runs:
+        tasks = datasets[run["settings"]["dataset"]]
+        task_ids = {f"task_{line_idx:02d}" for line_idx in range(len(tasks))}
+        output = sweep_dir / run["output"]
+        partial_path = sweep_dir / f"{run['run_id']}.partial.jsonl"
+
+        # 已有结果文件（可能来自 --limit 更小的一次执行）中的任务也算已完成
+        done = {}
+        if output.exists():
+            with open(output, "r", encoding="utf-8") as f:
+                done = {item["task_id"]: item for item in json.load(f)}
+        if task_ids <= done.keys():
+            print(f"跳过已完成的运行: {run['run_id']}")
+            continue
+        done.update(load_partial(partial_path))
+        progress[run["run_id"]] = {"run": run, "done": done, "partial": partial_path,
+                                   "task_ids": task_ids, "finalized": False}
+        for line_idx, task in enumerate(tasks):
+            task_id = f"task_{line_idx:02d}"
+            if task_id not in done:
+                pending.append((run, task_id, task))
+
+    print(f"共 {len(runs)} 个运行，待执行单元 {len(pending)} 个（并发 {concurrency}）")
+
+    lock = threading.Lock()
+
+    def execute(run, task_id, task):
+        """执行一个单元并在工作线程内写入进度文件；返回 (运行, 任务 ID, 是否记为完成)"""
+        settings = run["settings"]
+        try:
+            result = process_single_task(task, STRATEGY_MAP[settings["strategy"]], task_id,
+                                         options=call_options(settings), verbose=False)
+        except Exception as e:
+            # 提示词构造或解析出错时只记为失败单元，不影响其他单元
+            print(f"{run['run_id']} {task_id} 执行出错: {e}")
+            return run, task_id, False
+        # API 调用失败（无输出且无结束原因）或超时的单元不记为完成
+        if result["raw_output"] is None and result["finish_reason"] in (None, "timeout"):
+            return run, task_id, False
+
+        result["strategy"] = settings["strategy"]
+        result["run_id"] = run["run_id"]
+        result["settings"] = settings
+        entry = progress[run["run_id"]]
+        with lock:
+            with open(entry["partial"], "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            entry["done"][task_id] = result
+        return run, task_id, True
+
+    def finalize(entry):
+        results = sorted(entry["done"].values(), key=lambda item: item["task_id"])
+        write_json_atomic(sweep_dir / entry["run"]["output"], results)
+        entry["partial"].unlink(missing_ok=True)
+        print(f"运行 {entry['run']['run_id']} 完成，结果已保存到: {sweep_dir / entry['run']['output']}")
+
+    # 进度文件已包含全部任务（上次在写最终文件前中断）的运行直接收尾
+    for entry in progress.values():
+        if entry["task_ids"] <= entry["done"].keys():
+            entry["finalized"] = True
+            finalize(entry)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(execute, *cell) for cell in pending]
+        try:
+            for n_finished, future in enumerate(as_completed(futures), start=1):
+                run, task_id, recorded = future.result()
+                if not recorded:
+                    print(f"[{n_finished}/{len(pending)}] {run['run_id']} {task_id} 调用失败，重启后重试")
+                    continue
+                print(f"[{n_finished}/{len(pending)}] {run['run_id']} {task_id} 完成")
+
+                entry = progress[run["run_id"]]
+                # 结果由工作线程写入，同一运行的多个单元可能先后看到“全部完成”，只收尾一次
+                with lock:
+                    complete = entry["task_ids"] <= entry["done"].keys() and not entry["finalized"]
+                    entry["finalized"] = entry["finalized"] or complete
+                if complete:
+                    finalize(entry)
+        except BaseException:
+            # 中断（如 Ctrl-C）时取消尚未开始的单元；已完成的单元已写入进度文件，重启后续跑
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return runs
+
+
+def print_sweep_table(runs: List[dict], sweep_dir: Path):
+    """汇总所有已完成运行，打印一张按准确率降序的对比表"""
+    rows = []
+    for run in runs:
+        output = sweep_dir / run["output"]
+        if not output.exists():
+            continue
+        with open(output, "r", encoding="utf-8") as f:
+            results = json.load(f)
+        total = len(results)
+        correct = sum(exact_match(item["predicted_grid"], item["ground_truth"]) for item in results)
+        rows.append({
+            "run": run,
+            "accuracy": correct / total if total else 0,
+            "correct": correct,
+            "total": total,
+            "parse_failed": sum(item["predicted_grid"] is None for item in results),
+            "tokens": sum(total_tokens(item) for item in results) / total if total else 0,
+            "latency": sum(item.get("latency") or 0.0 for item in results) / total if total else 0,
+        })
+
+    print("\n" + "="*120)
+    print(f"扫描结果汇总（按准确率降序）: {sweep_dir}")
+    print("="*120)
+    for row in sorted(rows, key=lambda r: r["accuracy"], reverse=True):
+        s = row["run"]["settings"]
+        print(f"运行: {row['run']['run_id']:<28} | "
+              f"数据集: {s['dataset']:<8} | "
+              f"温度: {s['temperature']:<4} | "
+              f"max_tokens: {str(s['max_tokens'] or 'default'):<7} | "
+              f"模型: {str(s['model'] or 'default'):<14} | "
+              f"准确率: {row['accuracy']*100:5.2f}% ({row['correct']}/{row['total']}) | "
+              f"解析失败: {row['parse_failed']:>2} | "
+              f"平均 token: {row['tokens']:7.0f} | "
+              f"平均耗时: {row['latency']:5.1f}s")
+    unfinished = len(runs) - len(rows)
+    if unfinished:
+        print(f"另有 {unfinished} 个运行尚未完成，重新执行同一命令即可续跑")
+    print("="*120)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按声明式网格并行运行超参数扫描（策略 × 数据集 × 温度 × max_tokens × 模型）")
+    parser.add_argument("--grid", type=str, required=True,
+                        help="扫描网格 JSON 文件路径，格式见 README")
+    parser.add_argument("--output_dir", type=str, default="results/sweeps",
+                        help="扫描结果根目录（默认 results/sweeps/，每个扫描一个子目录）")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="所有运行共享的并发请求数（默认取网格文件中的 concurrency，否则为 4）")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="限制每个运行处理的样本数量（调试用）")
+
+    args = parser.parse_args()
+
+    with open(args.grid, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    spec.setdefault("name", Path(args.grid).stem)
+    concurrency = args.concurrency or spec.get("concurrency", 4)
+
+    runs = run_sweep(spec, args.output_dir, concurrency, args.limit)
+    print_sweep_table(runs, Path(args.output_dir) / spec["name"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from prompts.strategy_visual_cot import grid_to_matrix_str
+from utils.features import get_task_features, summarize_features
+
+def construct_prompt(d):
+    train_examples = d['train']
+    test_input = d['test'][0]['input']
+
+    # 预计算的网格特征（连通对象、对称性、调色板、尺寸关系），按任务哈希缓存在磁盘上
+    feature_summary = summarize_features(get_task_features(d))
+
+    # 1. System Prompt: 与 visual_cot 相同的观察-假设-执行流程，但观察可直接基于给出的特征
+    system_content = (
+        "You are an expert in Abstract Reasoning and Pattern Recognition.\n"
+        "Your task is to solve ARC (Abstraction and Reasoning Corpus) puzzles.\n\n"
+        "### Instructions:\n"
+        "1. **OBSERVE**: A precomputed analysis of every grid is provided (objects as same-color connected components with bounding boxes, symmetries, colors, and input/output changes). "
+        "Rely on it instead of scanning pixels one by one; only inspect the grids to confirm details.\n"
+        "2. **HYPOTHESIZE**: Formulate a transformation rule that explains the change from Input to Output for ALL examples.\n"
+        "3. **EXECUTE**: Apply this rule strictly to the Test Input.\n\n"
+        "### Output Format:\n"
+        "First, describe your reasoning briefly (Analysis & Rule).\n"
+        "Then, output the final answer inside a code block exactly like this:\n"
+        "```json\n"
+        "[[row1], [row2], ...]\n"
+        "```\n"
+        "Ensure the JSON is valid and contains only integers."
+    )
+
+    # 2. User Prompt: 网格 + 特征摘要
+    user_content = "Here are the training examples. Find the pattern and apply it to the test input.\n\n"
+
+    for idx, example in enumerate(train_examples):
+        user_content += f"--- Example {idx + 1} ---\n"
+        user_content += f"Input:\n{grid_to_matrix_str(example['input'])}\n\n"
+        user_content += f"Output:\n{grid_to_matrix_str(example['output'])}\n\n"
+
+    user_content += "--- Test Task ---\n"
+    user_content += f"Input:\n{grid_to_matrix_str(test_input)}\n\n"
+
+    # 3. 拼接特征摘要
+    user_content += "--- Precomputed Grid Analysis ---\n"
+    user_content += f"{feature_summary}\n\n"
+    user_content += "output the reasoning and the final result:\n"
+
+    messages = [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content}
+    ]
+
+    return messages
@@ -0,0 +1,207 @@
+import json
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.validate import expected_output_shape
+
+# 与 call_deepseek 原有固定参数保持一致，作为上限和无历史数据时的默认值
+DEFAULT_MAX_TOKENS = 8000
+DEFAULT_TIMEOUT = 120
+
+MIN_MAX_TOKENS = 256
+MIN_TIMEOUT = 30
+# 自适应 timeout 只会缩短等待，不超过原有固定值
+MAX_TIMEOUT = DEFAULT_TIMEOUT
+
+# 历史结果没有 usage 时，用输出字符数估算 token 数（网格中数字和分隔符往往各占一个 token，取偏保守的 2 字符/token）
+CHARS_PER_TOKEN = 2.0
+# 无论历史统计如何，至少为完整输出一个预期输出大小的网格预留 token
+TOKENS_PER_CELL = 3
+# 在分位数基础上额外预留的余量，降低截断概率
+TOKEN_HEADROOM = 1.25
+TIMEOUT_HEADROOM = 1.5
+# 每个分桶至少需要的样本数，不足时退回到策略级统计
+MIN_SAMPLES = 5
+
+# 按测试输入面积分桶：(桶名, 面积上限)
+AREA_BUCKETS = [("small", 100), ("medium", 400), ("large", 900)]
+
+
+def area_bucket(area: int) -> str:
+    """将网格面积映射到分桶名"""
+    for name, upper in AREA_BUCKETS:
+        if area <= upper:
+            return name
+    return AREA_BUCKETS[-1][0]
+
+
+def task_area(task: dict) -> int:
+    """任务规模：测试输入网格的面积"""
+    grid = task["test"][0]["input"]
+    return len(grid) * (len(grid[0]) if grid else 0)
+
+
+def expected_output_area(task: dict) -> int:
+    """预期输出网格的面积：能从训练样本推断输出尺寸时使用推断值，否则退回测试输入面积"""
+    shape = expected_output_shape(task)
+    if shape is None:
+        return task_area(task)
+    return shape[0] * shape[1]
+
+
+def _dataset_from_stem(stem: str):
+    """从结果文件名解析数据集名，规则与 evaluate.py 的 print_summary 一致"""
+    if stem.endswith("_val_hard"):
+        return "val_hard"
+    if stem.endswith("_val"):
+        return "val"
+    return None
+
+
+def _percentile(values: list, q: float) -> float:
+    """线性插值分位数，q 取 0~100"""
+    values = sorted(values)
+    if len(values) == 1:
+        return float(values[0])
+    pos = (len(values) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+def collect_observations(results_dir: str = "results", data_dir: str = "data") -> list:
+    """
+    从历史结果文件中收集每次调用的输出长度和耗时。
+
+    返回:
+    list: [{"strategy", "bucket", "completion_tokens", "latency"(可能为 None)}, ...]
+    """
+    observations = []
+    datasets = {}
+
+    for pred_file in sorted(Path(results_dir).glob("*.json")):
+        dataset = _dataset_from_stem(pred_file.stem)
+        data_path = Path(data_dir) / f"{dataset}.jsonl"
+        if dataset is None or not data_path.exists():
+            continue
+        if dataset not in datasets:
+            with open(data_path, "r", encoding="utf-8") as f:
+                datasets[dataset] = [json.loads(line) for line in f]
+        tasks = datasets[dataset]
+
+        with open(pred_file, "r", encoding="utf-8") as f:
+            preds = json.load(f)
+
+        for idx, item in enumerate(preds):
+            raw_output = item.get("raw_output")
+            # 级联结果混合了多个策略，复用同构任务答案的结果没有实际调用 API，均不参与统计
+            strategy = item.get("strategy")
+            if not raw_output or not strategy or strategy == "cascade" or item.get("reused_from") or idx >= len(tasks):
+                continue
+
+            usage = item.get("usage") or {}
+            completion_tokens = usage.get("completion_tokens") or len(raw_output) / CHARS_PER_TOKEN
+            observations.append({
+                "strategy": strategy,
+                "bucket": area_bucket(task_area(tasks[idx])),
+                "completion_tokens": completion_tokens,
+                "latency": item.get("latency"),
+            })
+
+    return observations
+
+
+def _summarize(group: list, percentile: float) -> dict:
+    """对一组观测求 token 和耗时的分位数"""
+    tokens = [o["completion_tokens"] for o in group]
+    latencies = [o["latency"] for o in group if o["latency"] is not None]
+    return {
+        "n": len(group),
+        "tokens": _percentile(tokens, percentile),
+        "latency": _percentile(latencies, percentile) if len(latencies) >= MIN_SAMPLES else None,
+    }
+
+
+def build_budget_profile(results_dir: str = "results", data_dir: str = "data", percentile: float = 95) -> dict:
+    """
+    按 (策略, 面积分桶) 统计历史输出长度和耗时的分位数。
+
+    返回:
+    dict: {"percentile", "strategies": {策略: {"all": 统计, "buckets": {桶: 统计}}}}
+    """
+    groups = {}
+    for obs in collect_observations(results_dir, data_dir):
+        groups.setdefault(obs["strategy"], []).append(obs)
+
+    profile = {"percentile": percentile, "strategies": {}}
+    for strategy, group in groups.items():
+        buckets = {}
+        for name, _ in AREA_BUCKETS:
+            bucket_group = [o for o in group if o["bucket"] == name]
+            if len(bucket_group) >= MIN_SAMPLES:
+                buckets[name] = _summarize(bucket_group, percentile)
+        profile["strategies"][strategy] = {"all": _summarize(group, percentile), "buckets": buckets}
+    return profile
+
+
+def lookup_budget(profile: dict, strategy: str, area: int, output_area: Optional[int] = None) -> tuple:
+    """
+    查询某策略在给定网格面积下的 (max_tokens, timeout)。
+
+    area 为测试输入面积，用于选择分桶；output_area 为预期输出面积（见 expected_output_area），
+    用于保证 max_tokens 足够输出完整答案，缺省时按输入面积计算。
+    分桶样本不足时退回策略级统计；策略没有历史数据时返回默认值。
+    """
+    entry = (profile or {}).get("strategies", {}).get(strategy)
+    if entry is None:
+        return DEFAULT_MAX_TOKENS, DEFAULT_TIMEOUT
+
+    stats = entry["buckets"].get(area_bucket(area), entry["all"])
+    floor = max(MIN_MAX_TOKENS, (output_area or area) * TOKENS_PER_CELL)
+    max_tokens = int(min(max(stats["tokens"] * TOKEN_HEADROOM, floor), DEFAULT_MAX_TOKENS))
+
+    latency = stats["latency"] if stats["latency"] is not None else entry["all"]["latency"]
+    if latency is None:
+        timeout = DEFAULT_TIMEOUT
+    else:
+        timeout = int(min(max(latency * TIMEOUT_HEADROOM, MIN_TIMEOUT), MAX_TIMEOUT))
+    return max_tokens, timeout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据历史结果统计各策略的输出长度/耗时分布，给出自适应 max_tokens 和 timeout")
+    parser.add_argument("--results_dir", type=str, default="results",
+                        help="结果目录（默认 results/）")
+    parser.add_argument("--percentile", type=float, default=95,
+                        help="使用的分位数（默认 95）")
+
+    args = parser.parse_args()
+
+    profile = build_budget_profile(args.results_dir, percentile=args.percentile)
+    if not profile["strategies"]:
+        print(f"{args.results_dir}/ 下没有可用的历史结果")
+        return
+
+    print("\n" + "="*80)
+    print(f"输出长度 / 耗时画像（P{args.percentile:g}）")
+    print("="*80)
+    for strategy, entry in sorted(profile["strategies"].items()):
+        for name, upper in AREA_BUCKETS:
+            stats = entry["buckets"].get(name)
+            label = name if stats else f"{name}*"
+            max_tokens, timeout = lookup_budget(profile, strategy, upper)
+            n = stats["n"] if stats else entry["all"]["n"]
+            print(f"策略: {strategy:<20} | 面积桶: {label:<8} | 样本: {n:>3} | "
+                  f"max_tokens: {max_tokens:>5} | timeout: {timeout:>4}s")
+    print("="*80)
+    print("* 表示该分桶样本不足，使用策略级统计")
+
+
+if __name__ == "__main__":
+    main()
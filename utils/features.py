@@ -0,0 +1,247 @@
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+import numpy as np
+
+from utils.fingerprint import task_grids
+from utils.fileio import write_json_atomic
+
+# 特征格式版本：修改特征内容后请递增，旧缓存会自动失效
+FEATURE_VERSION = 3
+DEFAULT_CACHE_DIR = "cache/features"
+# 摘要中每个网格最多列出的对象数
+MAX_OBJECTS_IN_SUMMARY = 8
+
+
+def task_hash(task: dict) -> str:
+    """任务内容哈希（只包含训练样本和测试输入，不含测试答案）"""
+    payload = json.dumps(task_grids(task), separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def label_components(grid: np.ndarray) -> np.ndarray:
+    """
+    同色 4 连通分量标记（向量化的标签传播）。
+
+    每个像素以自身线性下标 + 1 作为初始标签，反复与同色上下左右邻居取最小值，直到不再变化。
+
+    返回:
+    np.ndarray: 与 grid 同形状的标签数组，同一连通分量标签相同
+    """
+    h, w = grid.shape
+    labels = np.arange(1, h * w + 1).reshape(h, w)
+    same_down = grid[1:, :] == grid[:-1, :]
+    same_right = grid[:, 1:] == grid[:, :-1]
+
+    while True:
+        prev = labels
+        labels = labels.copy()
+        # 纵向传播
+        down = np.where(same_down, np.minimum(labels[1:, :], labels[:-1, :]), labels[1:, :])
+        up = np.where(same_down, np.minimum(labels[1:, :], labels[:-1, :]), labels[:-1, :])
+        labels[1:, :] = np.minimum(labels[1:, :], down)
+        labels[:-1, :] = np.minimum(labels[:-1, :], up)
+        # 横向传播
+        right = np.where(same_right, np.minimum(labels[:, 1:], labels[:, :-1]), labels[:, 1:])
+        left = np.where(same_right, np.minimum(labels[:, 1:], labels[:, :-1]), labels[:, :-1])
+        labels[:, 1:] = np.minimum(labels[:, 1:], right)
+        labels[:, :-1] = np.minimum(labels[:, :-1], left)
+        if np.array_equal(labels, prev):
+            return labels
+
+
+def grid_features(grid) -> dict:
+    """计算单个网格的特征：尺寸、调色板、直方图、背景色、对称性和对象（非背景连通分量）"""
+    g = np.asarray(grid, dtype=np.int64)
+    h, w = g.shape
+    histogram = np.bincount(g.ravel(), minlength=10)[:10]
+    background = int(histogram.argmax())
+
+    # 标签会原样写入提示词，使用不依赖“水平/竖直”约定的名称
+    symmetry = [name for name, mirrored in (
+        ("mirror_left_right", g[:, ::-1]),
+        ("mirror_top_bottom", g[::-1, :]),
+        ("rotate_180", g[::-1, ::-1]),
+    ) if np.array_equal(g, mirrored)]
+    if h == w:
+        if np.array_equal(g, g.T):
+            symmetry.append("main_diagonal")
+        if np.array_equal(g, np.rot90(g)):
+            symmetry.append("rotate_90")
+
+    labels = label_components(g)
+    flat_labels = labels.ravel()
+    uniq, first_idx, sizes = np.unique(flat_labels, return_index=True, return_counts=True)
+    colors = g.ravel()[first_idx]
+    rows, cols = np.divmod(np.arange(h * w), w)
+    # 按标签分组求包围盒
+    inverse = np.searchsorted(uniq, flat_labels)
+    top = np.full(len(uniq), h)
+    left = np.full(len(uniq), w)
+    bottom = np.full(len(uniq), -1)
+    right = np.full(len(uniq), -1)
+    np.minimum.at(top, inverse, rows)
+    np.minimum.at(left, inverse, cols)
+    np.maximum.at(bottom, inverse, rows)
+    np.maximum.at(right, inverse, cols)
+
+    objects = [{
+        "color": int(colors[k]),
+        "size": int(sizes[k]),
+        "bbox": [int(top[k]), int(left[k]), int(bottom[k]), int(right[k])],
+    } for k in range(len(uniq)) if colors[k] != background]
+    objects.sort(key=lambda o: (-o["size"], o["bbox"]))
+
+    return {
+        "shape": [h, w],
+        "palette": [int(c) for c in np.flatnonzero(histogram)],
+        "histogram": [int(n) for n in histogram],
+        "background": background,
+        "symmetry": symmetry,
+        "n_objects": len(objects),
+        "objects": objects,
+    }
+
+
+def shape_relation(in_shape, out_shape) -> str:
+    """描述输入到输出的尺寸关系"""
+    (ih, iw), (oh, ow) = in_shape, out_shape
+    if (ih, iw) == (oh, ow):
+        return "same"
+    if (ih, iw) == (ow, oh):
+        return "transposed"
+    if oh % ih == 0 and ow % iw == 0:
+        return f"scale_up {oh // ih}x{ow // iw}"
+    if ih % oh == 0 and iw % ow == 0:
+        return f"scale_down {ih // oh}x{iw // ow}"
+    return f"{ih}x{iw} -> {oh}x{ow}"
+
+
+def pair_features(in_feat: dict, out_feat: dict, input_grid, output_grid) -> dict:
+    """计算一个输入/输出对之间的关系特征"""
+    relation = shape_relation(in_feat["shape"], out_feat["shape"])
+    features = {
+        "shape_relation": relation,
+        "colors_added": sorted(set(out_feat["palette"]) - set(in_feat["palette"])),
+        "colors_removed": sorted(set(in_feat["palette"]) - set(out_feat["palette"])),
+    }
+    if relation == "same":
+        a, b = np.asarray(input_grid), np.asarray(output_grid)
+        changed = a != b
+        features["changed_cells"] = int(changed.sum())
+        # 逐像素颜色映射：只有某输入颜色的全部像素都变成同一种输出颜色时才算完整映射，
+        # 仅部分像素变色的记为 partial_recolor
+        color_map, partial = {}, []
+        for src in np.unique(a[changed]):
+            targets = np.unique(b[a == src])
+            if len(targets) == 1:
+                color_map[str(int(src))] = int(targets[0])
+            else:
+                partial.extend([int(src), int(dst)] for dst in np.unique(b[changed & (a == src)]))
+        if color_map:
+            features["color_map"] = color_map
+        if partial:
+            features["partial_recolor"] = partial
+    return features
+
+
+def compute_task_features(task: dict) -> dict:
+    """计算任务全部特征（训练样本的输入/输出和测试输入；不使用测试答案）"""
+    train = []
+    for example in task["train"]:
+        in_feat = grid_features(example["input"])
+        out_feat = grid_features(example["output"])
+        train.append({
+            "input": in_feat,
+            "output": out_feat,
+            "relation": pair_features(in_feat, out_feat, example["input"], example["output"]),
+        })
+    return {
+        "version": FEATURE_VERSION,
+        "train": train,
+        "test_input": grid_features(task["test"][0]["input"]),
+    }
+
+
+def get_task_features(task: dict, cache_dir: str = DEFAULT_CACHE_DIR) -> dict:
+    """读取任务特征缓存（按任务哈希），未命中或版本不符时重新计算并写入缓存"""
+    path = Path(cache_dir) / f"{task_hash(task)}.json"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            features = json.load(f)
+        if features.get("version") == FEATURE_VERSION:
+            return features
+
+    features = compute_task_features(task)
+    write_json_atomic(path, features, indent=None)
+    return features
+
+
+def _summarize_grid(feat: dict) -> str:
+    """单个网格特征的一行摘要"""
+    h, w = feat["shape"]
+    objects = ", ".join(
+        f"color {o['color']} size {o['size']} at rows {o['bbox'][0]}-{o['bbox'][2]} cols {o['bbox'][1]}-{o['bbox'][3]}"
+        for o in feat["objects"][:MAX_OBJECTS_IN_SUMMARY]
+    )
+    more = f" (+{feat['n_objects'] - MAX_OBJECTS_IN_SUMMARY} more)" if feat["n_objects"] > MAX_OBJECTS_IN_SUMMARY else ""
+    return (f"{h}x{w}, background {feat['background']}, colors {feat['palette']}, "
+            f"symmetry {feat['symmetry'] or 'none'}, {feat['n_objects']} objects"
+            + (f": {objects}{more}" if objects else ""))
+
+
+def summarize_features(features: dict) -> str:
+    """把任务特征压缩成提示词中可直接插入的文本摘要"""
+    lines = []
+    for idx, pair in enumerate(features["train"]):
+        rel = pair["relation"]
+        lines.append(f"Example {idx + 1}:")
+        lines.append(f"  Input: {_summarize_grid(pair['input'])}")
+        lines.append(f"  Output: {_summarize_grid(pair['output'])}")
+        change = f"  Change: shape {rel['shape_relation']}"
+        if rel["colors_added"]:
+            change += f", colors added {rel['colors_added']}"
+        if rel["colors_removed"]:
+            change += f", colors removed {rel['colors_removed']}"
+        if "changed_cells" in rel:
+            change += f", {rel['changed_cells']} cells changed"
+        if rel.get("color_map"):
+            change += f", color map (all cells) {rel['color_map']}"
+        if rel.get("partial_recolor"):
+            change += ", some cells recolored " + ", ".join(f"{src}->{dst}" for src, dst in rel["partial_recolor"])
+        lines.append(change)
+    lines.append(f"Test Input: {_summarize_grid(features['test_input'])}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预计算任务特征并写入磁盘缓存（按任务哈希）")
+    parser.add_argument("--data", type=str, nargs="+", default=["data/val.jsonl", "data/val_hard.jsonl"],
+                        help="要预处理的数据文件（默认 data/val.jsonl data/val_hard.jsonl）")
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR,
+                        help=f"特征缓存目录（默认 {DEFAULT_CACHE_DIR}/）")
+    parser.add_argument("--show", type=int, default=None,
+                        help="打印第一个数据文件中该索引任务的特征摘要")
+
+    args = parser.parse_args()
+
+    for path in args.data:
+        with open(path, "r", encoding="utf-8") as f:
+            tasks = [json.loads(line) for line in f]
+        for task in tasks:
+            get_task_features(task, args.cache_dir)
+        print(f"{path}: 已缓存 {len(tasks)} 个任务的特征 -> {args.cache_dir}/")
+
+        if args.show is not None and path == args.data[0]:
+            print(summarize_features(get_task_features(tasks[args.show], args.cache_dir)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import json
+import stat
+import tempfile
+from pathlib import Path
+
+# 进程的 umask，只在导入时读取一次（os.umask 会修改全局状态，不能在多线程中反复调用）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_json_atomic(path, obj, indent=2):
+    """
+    原子写入 JSON 文件：先写同目录临时文件，再用 os.replace 覆盖，中途失败不会破坏原文件。
+
+    mkstemp 创建的临时文件权限为 0600，替换前会改成原文件的权限（新文件则按 umask 取默认权限）。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    else:
+        mode = 0o666 & ~_UMASK
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=indent)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
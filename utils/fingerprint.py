@@ -0,0 +1,248 @@
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import sys
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from utils.fileio import write_json_atomic
+
+
+# 二面体群 D4 的 8 个变换，作用于二维列表网格
+def _identity(g):
+    return [list(row) for row in g]
+
+
+def _rot90(g):
+    """顺时针旋转 90°"""
+    return [list(row) for row in zip(*g[::-1])]
+
+
+def _rot180(g):
+    return [list(row[::-1]) for row in g[::-1]]
+
+
+def _rot270(g):
+    """逆时针旋转 90°"""
+    return [list(row) for row in zip(*g)][::-1]
+
+
+def _flip_lr(g):
+    return [list(row[::-1]) for row in g]
+
+
+def _flip_ud(g):
+    return [list(row) for row in g[::-1]]
+
+
+def _transpose(g):
+    return [list(row) for row in zip(*g)]
+
+
+def _anti_transpose(g):
+    return _rot180(_transpose(g))
+
+
+TRANSFORMS = [_identity, _rot90, _rot180, _rot270, _flip_lr, _flip_ud, _transpose, _anti_transpose]
+# INVERSE[i] 为 TRANSFORMS[i] 的逆变换下标
+INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+
+def _relabel(grids, color_map=None):
+    """
+    按行优先扫描顺序对颜色重新编号（第一个出现的颜色记为 0，依此类推）。
+
+    返回:
+    tuple: (重编号后的网格列表, 原颜色 -> 新颜色 的映射)
+    """
+    color_map = dict(color_map or {})
+    relabeled = []
+    for grid in grids:
+        new_grid = []
+        for row in grid:
+            new_row = []
+            for v in row:
+                if v not in color_map:
+                    color_map[v] = len(color_map)
+                new_row.append(color_map[v])
+            new_grid.append(new_row)
+        relabeled.append(new_grid)
+    return relabeled, color_map
+
+
+def canonicalize(grids):
+    """
+    在 8 个二面体变换 × 颜色重编号下求网格序列的规范形式。
+
+    对每个变换先作用于全部网格，再统一做颜色重编号，取序列化结果字典序最小者。
+
+    返回:
+    tuple: (规范网格列表, 变换下标, 原颜色 -> 规范颜色 的映射)
+    """
+    best = None
+    for t_idx, transform in enumerate(TRANSFORMS):
+        relabeled, color_map = _relabel([transform(g) for g in grids])
+        key = json.dumps(relabeled, separators=(",", ":"))
+        if best is None or key < best[0]:
+            best = (key, relabeled, t_idx, color_map)
+    _, canonical, t_idx, color_map = best
+    return canonical, t_idx, color_map
+
+
+def _hash(canonical) -> str:
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def task_grids(task: dict) -> list:
+    """任务中参与指纹计算的网格：所有训练样本的输入/输出，以及测试输入（不含测试答案）"""
+    grids = []
+    for example in task["train"]:
+        grids.extend([example["input"], example["output"]])
+    grids.append(task["test"][0]["input"])
+    return grids
+
+
+def task_fingerprint(task: dict) -> tuple:
+    """
+    计算任务指纹；同构任务（旋转、翻转、颜色置换后相同）得到相同指纹。
+
+    返回:
+    tuple: (指纹字符串, 变换下标, 原颜色 -> 规范颜色 的映射)
+    """
+    canonical, t_idx, color_map = canonicalize(task_grids(task))
+    return _hash(canonical), t_idx, color_map
+
+
+def to_canonical(grid, t_idx: int, color_map: dict):
+    """把该任务坐标系下的网格映射到规范坐标系；网格中出现任务外的新颜色时按出现顺序追加编号"""
+    relabeled, _ = _relabel([TRANSFORMS[t_idx](grid)], color_map)
+    return relabeled[0]
+
+
+def from_canonical(grid, t_idx: int, color_map: dict):
+    """把规范坐标系下的网格映射回任务坐标系；存在无法还原的颜色时返回 None"""
+    inverse_colors = {v: k for k, v in color_map.items()}
+    try:
+        recolored = [[inverse_colors[v] for v in row] for row in grid]
+    except KeyError:
+        return None
+    return TRANSFORMS[INVERSE[t_idx]](recolored)
+
+
+def load_index(path) -> dict:
+    """加载指纹索引文件，不存在时返回空索引"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index(path, index: dict):
+    """原子写入指纹索引文件"""
+    write_json_atomic(path, index, indent=None)
+
+
+def lookup_answer(index: dict, namespace: str, task: dict, exclude_source: Optional[str] = None):
+    """
+    在索引中查找同构任务的已知答案，并映射回当前任务的坐标系和颜色。
+
+    参数:
+    namespace (str): 索引分区（策略及其模型、温度、提示词等设置），避免不同配置的答案互相复用
+    exclude_source (str): 当前任务自身的来源标识（"数据集/任务 ID"）；来源相同的记录是该任务自己上次的答案，
+                          不算同构命中（恒等变换不应让重跑直接回放旧答案）
+
+    返回:
+    tuple: (网格, 来源记录)；未命中或颜色无法还原时返回 (None, None)
+    """
+    fp, t_idx, color_map = task_fingerprint(task)
+    entry = index.get(namespace, {}).get(fp)
+    if entry is None or entry["source"] == exclude_source:
+        return None, None
+    grid = from_canonical(entry["answer"], t_idx, color_map)
+    return (grid, entry) if grid is not None else (None, None)
+
+
+def record_answer(index: dict, namespace: str, task: dict, grid, source: str):
+    """把任务答案以规范形式写入索引（已存在其他同构任务的记录时不覆盖；同一任务重跑时更新为新答案）"""
+    if grid is None:
+        return
+    fp, t_idx, color_map = task_fingerprint(task)
+    entries = index.setdefault(namespace, {})
+    if fp in entries and entries[fp]["source"] != source:
+        return
+    entries[fp] = {
+        "answer": to_canonical(grid, t_idx, color_map),
+        "source": source,
+    }
+
+
+def find_duplicates(named_tasks: list) -> tuple:
+    """
+    在多个数据集之间查找同构任务和同构的训练/测试样本对。
+
+    参数:
+    named_tasks (list): [(数据集名, 任务列表), ...]
+
+    返回:
+    tuple: (任务级重复组列表, 样本对级重复组列表)，每组为 [(数据集名, 任务下标, 说明), ...]
+    """
+    task_groups, pair_groups = {}, {}
+    for name, tasks in named_tasks:
+        for idx, task in enumerate(tasks):
+            fp, _, _ = task_fingerprint(task)
+            task_groups.setdefault(fp, []).append((name, idx, "task"))
+
+            examples = [("train", i, ex) for i, ex in enumerate(task["train"])]
+            examples += [("test", i, ex) for i, ex in enumerate(task["test"]) if "output" in ex]
+            for split, i, ex in examples:
+                canonical, _, _ = canonicalize([ex["input"], ex["output"]])
+                pair_groups.setdefault(_hash(canonical), []).append((name, idx, f"{split}[{i}]"))
+
+    def tasks_of(group):
+        return frozenset((n, i) for n, i, _ in group)
+
+    # 同一任务内部的重复样本对不算泄漏
+    task_dups = [g for g in task_groups.values() if len(tasks_of(g)) > 1]
+    # 已被任务级重复覆盖的样本对不再重复报告
+    covered = {tasks_of(g) for g in task_dups}
+    pair_dups = [g for g in pair_groups.values()
+                 if len(tasks_of(g)) > 1 and tasks_of(g) not in covered]
+    return task_dups, pair_dups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于规范指纹检测数据集之间的同构任务（旋转/翻转/颜色置换）")
+    parser.add_argument("--data", type=str, nargs="+", default=["data/val.jsonl", "data/val_hard.jsonl"],
+                        help="要检查的数据文件（默认 data/val.jsonl data/val_hard.jsonl）")
+
+    args = parser.parse_args()
+
+    named_tasks = []
+    for path in args.data:
+        with open(path, "r", encoding="utf-8") as f:
+            named_tasks.append((Path(path).stem, [json.loads(line) for line in f]))
+
+    task_dups, pair_dups = find_duplicates(named_tasks)
+
+    def fmt(group):
+        return ", ".join(f"{name}#{idx:02d}" + ("" if what == "task" else f".{what}") for name, idx, what in group)
+
+    print("\n" + "="*80)
+    print(f"同构任务检测: {', '.join(name for name, _ in named_tasks)}")
+    print("="*80)
+    print(f"同构任务组: {len(task_dups)}")
+    for group in task_dups:
+        print(f"  {fmt(group)}")
+    print(f"同构样本对组（跨任务，不含上述同构任务）: {len(pair_dups)}")
+    for group in pair_dups:
+        print(f"  {fmt(group)}")
+    print("="*80)
+
+
+if __name__ == "__main__":
+    main()
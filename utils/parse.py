@@ -2,6 +2,10 @@ import re
 import json
 import ast
 
+# 解析器版本号：修改 parse_output 及其辅助函数的行为后请递增，
+# reparse 命令会把该版本写入结果文件，便于追踪预测来自哪个解析器
+PARSER_VERSION = 1
+
 def parse_output(text):
     """
     解析大语言模型的输出文本，提取预测的网格。
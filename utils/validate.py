@@ -0,0 +1,106 @@
+from collections import Counter
+
+
+def grid_shape(grid):
+    """返回网格的 (行数, 列数)；非矩形网格返回 None"""
+    if not grid or not all(isinstance(row, list) for row in grid):
+        return None
+    width = len(grid[0])
+    if width == 0 or any(len(row) != width for row in grid):
+        return None
+    return (len(grid), width)
+
+
+def expected_output_shape(task):
+    """
+    根据训练样本推断测试输出应有的尺寸。
+
+    依次尝试以下规则，全部训练样本都满足才采用：
+    1. 输出尺寸 == 输入尺寸
+    2. 输出尺寸为常数
+    3. 输出尺寸 == 输入尺寸按固定整数比例缩放（放大或缩小）
+
+    返回:
+    tuple: (行数, 列数)；无法推断时返回 None
+    """
+    pairs = [(grid_shape(ex["input"]), grid_shape(ex["output"])) for ex in task["train"]]
+    test_shape = grid_shape(task["test"][0]["input"])
+    if not pairs or test_shape is None or any(i is None or o is None for i, o in pairs):
+        return None
+
+    # 1. 尺寸不变
+    if all(i == o for i, o in pairs):
+        return test_shape
+
+    # 2. 常数尺寸
+    if len({o for _, o in pairs}) == 1:
+        return pairs[0][1]
+
+    # 3. 固定比例缩放
+    def ratio(a, b):
+        if b % a == 0:
+            return ("up", b // a)
+        if a % b == 0:
+            return ("down", a // b)
+        return None
+
+    ratios = {(ratio(i[0], o[0]), ratio(i[1], o[1])) for i, o in pairs}
+    if len(ratios) == 1:
+        (row_ratio, col_ratio), = ratios
+        if row_ratio is not None and col_ratio is not None:
+            def apply(size, r):
+                kind, k = r
+                if kind == "up":
+                    return size * k
+                return size // k if size % k == 0 else None
+            rows, cols = apply(test_shape[0], row_ratio), apply(test_shape[1], col_ratio)
+            if rows and cols:
+                return (rows, cols)
+
+    return None
+
+
+def check_prediction(task, grid):
+    """
+    对预测网格做本地合法性检查（不需要 ground truth）。
+
+    返回:
+    tuple: (是否通过, 原因)，原因为 "ok" / "parse_failed" / "ragged" / "bad_color" / "shape_mismatch"
+    """
+    if grid is None:
+        return False, "parse_failed"
+
+    shape = grid_shape(grid)
+    if shape is None:
+        return False, "ragged"
+
+    if any(not isinstance(v, int) or v < 0 or v > 9 for row in grid for v in row):
+        return False, "bad_color"
+
+    expected = expected_output_shape(task)
+    if expected is not None and shape != expected:
+        return False, "shape_mismatch"
+
+    return True, "ok"
+
+
+def majority_vote(grids):
+    """
+    对多次采样的网格做多数投票（解析失败的样本计入分母）。
+
+    返回:
+    tuple: (得票最多的网格或 None, 一致率 0~1)
+    """
+    if not grids:
+        return None, 0.0
+    counts = Counter(grid_key(g) for g in grids if g is not None)
+    if not counts:
+        return None, 0.0
+    key, votes = counts.most_common(1)[0]
+    winner = next(g for g in grids if g is not None and grid_key(g) == key)
+    return winner, votes / len(grids)
+
+
+def grid_key(grid):
+    """将网格转成可哈希的元组，用于计数和比较"""
+    return tuple(tuple(row) for row in grid)